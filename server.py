@@ -1,26 +1,297 @@
 #/usr/bin/env python3
 import asyncio
+import collections
+import os
+import socket
 import struct
-import binascii
+import zlib
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 import logging
 
 logger = logging.getLogger(__name__)
 
-async def send_cmd(writer, cmd, arg0, arg1, data=b""):
-    if isinstance(data, str):
-        data = data.encode()
-    cmd_id, = struct.unpack("<I", cmd)
-    header = struct.pack("<IIIIII", cmd_id, arg0, arg1, len(data), binascii.crc32(data), cmd_id ^ 0xFFFFFFFF)
-    writer.write(header + data)
+_HDR = struct.Struct("<IIIIII")
+_U32 = struct.Struct("<I")
+
+CMD_CNXN, = _U32.unpack(b"CNXN")
+CMD_OPEN, = _U32.unpack(b"OPEN")
+CMD_OKAY, = _U32.unpack(b"OKAY")
+CMD_WRTE, = _U32.unpack(b"WRTE")
+CMD_CLSE, = _U32.unpack(b"CLSE")
+
+SOCK_BUF_SIZE = 4 << 20
+MAX_DATA_LEN = 256 * 1024
+
+def tune_socket(writer):
+    """Disable Nagle and enlarge kernel buffers on the writer's socket"""
+    sock = writer.get_extra_info('socket')
+    if sock is None:
+        return
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCK_BUF_SIZE)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCK_BUF_SIZE)
+
+def pack_header(cmd_id, arg0, arg1, data=b"", _pack=_HDR.pack, _crc32=zlib.crc32):
+    # _pack/_crc32 are bound at definition time to skip global lookups per packet
+    if not data:
+        # Control frames (OKAY/CLSE/...) carry no payload: no length or CRC
+        return _pack(cmd_id, arg0, arg1, 0, 0, cmd_id ^ 0xFFFFFFFF)
+    return _pack(cmd_id, arg0, arg1, len(data), _crc32(data), cmd_id ^ 0xFFFFFFFF)
+
+async def send_cmd(writer, cmd_id, arg0, arg1, data=b""):
+    header = pack_header(cmd_id, arg0, arg1, data)
+    if data:
+        writer.writelines((header, data))
+    else:
+        writer.write(header)
+    await writer.drain()
+
+async def send_host_cmd(writer, cmd_b):
+    """Send a length-prefixed request to the ADB host server"""
+    writer.writelines((b"%04x" % len(cmd_b), cmd_b))
     await writer.drain()
 
 async def recv_cmd(reader):
     header = await reader.readexactly(24)
-    cmd_id, arg0, arg1, data_len, crc32, magic = struct.unpack("<IIIIII", header)
+    cmd_id, arg0, arg1, data_len, crc32, magic = _HDR.unpack_from(header)
     if cmd_id != magic ^ 0xFFFFFFFF:
         raise Exception("Magic mismatch")
     data = await reader.readexactly(data_len)
-    return header[:4], arg0, arg1, data
+    return cmd_id, arg0, arg1, data
+
+class BufferedStreamProtocol(asyncio.BufferedProtocol):
+    """Base for buffered protocols that are written to through a StreamWriter.
+
+    Provides the write flow control StreamWriter.drain() relies on. This is
+    not taken from asyncio.streams.FlowControlMixin because that subclasses
+    asyncio.Protocol, which uvloop then treats as a non-buffered protocol.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._transport = None
+        self._closed = self._loop.create_future()
+        self._write_paused = False
+        self._drain_waiters = collections.deque()
+        self._connection_lost = False
+
+    def connection_made(self, transport):
+        self._transport = transport
+
+    def connection_lost(self, exc):
+        self._connection_lost = True
+        self._wake_drain_waiters(exc)
+        if not self._closed.done():
+            self._closed.set_result(None)
+
+    def pause_writing(self):
+        self._write_paused = True
+
+    def resume_writing(self):
+        self._write_paused = False
+        self._wake_drain_waiters(None)
+
+    def _wake_drain_waiters(self, exc):
+        for waiter in self._drain_waiters:
+            if not waiter.done():
+                if exc is None:
+                    waiter.set_result(None)
+                else:
+                    waiter.set_exception(exc)
+
+    async def _drain_helper(self):
+        if self._connection_lost:
+            raise ConnectionResetError("Connection lost")
+        if not self._write_paused:
+            return
+        waiter = self._loop.create_future()
+        self._drain_waiters.append(waiter)
+        try:
+            await waiter
+        finally:
+            self._drain_waiters.remove(waiter)
+
+    def _get_close_waiter(self, stream):
+        return self._closed
+
+class AdbPacketProtocol(BufferedStreamProtocol):
+    """Parse ADB packets straight out of a preallocated receive buffer.
+
+    Replaces StreamReader on the client-facing side of the proxy: the kernel
+    reads into our buffer, headers are unpacked in place and each complete
+    packet is queued for recv_cmd(). Writes go through a regular StreamWriter.
+    """
+
+    def __init__(self, client_connected_cb, max_data_len=MAX_DATA_LEN, queue_limit=64):
+        super().__init__()
+        self._client_connected_cb = client_connected_cb
+        self._buf = bytearray(_HDR.size + max_data_len)
+        self._mv = memoryview(self._buf)
+        self._start = 0
+        self._end = 0
+        self._packets = asyncio.Queue()
+        self._queue_limit = queue_limit
+        self._reading_paused = False
+        self._task = None
+
+    def connection_made(self, transport):
+        super().connection_made(transport)
+        writer = asyncio.StreamWriter(transport, self, None, self._loop)
+        self._task = self._loop.create_task(self._client_connected_cb(self, writer))
+
+    def connection_lost(self, exc):
+        super().connection_lost(exc)
+        self._packets.put_nowait(exc or ConnectionResetError("Connection closed"))
+
+    def get_buffer(self, sizehint):
+        return self._mv[self._end:]
+
+    def buffer_updated(self, nbytes):
+        mv = self._mv
+        start = self._start
+        end = self._end + nbytes
+        needed = _HDR.size
+        while end - start >= _HDR.size:
+            cmd_id, arg0, arg1, data_len, crc32, magic = _HDR.unpack_from(mv, start)
+            if cmd_id != magic ^ 0xFFFFFFFF:
+                self._fail(Exception("Magic mismatch"))
+                return
+            needed = _HDR.size + data_len
+            if needed > len(mv):
+                self._fail(Exception(f"Packet too large: {data_len} bytes"))
+                return
+            if end - start < needed:
+                break
+            data = bytes(mv[start + _HDR.size:start + needed])
+            self._packets.put_nowait((cmd_id, arg0, arg1, data))
+            start += needed
+            needed = _HDR.size
+        if start == end:
+            start = end = 0
+        elif start + needed > len(mv):
+            # Move the partial packet to the front so it fits in the buffer
+            tail = bytes(mv[start:end])
+            end = len(tail)
+            mv[:end] = tail
+            start = 0
+        self._start = start
+        self._end = end
+        if not self._reading_paused and self._packets.qsize() >= self._queue_limit:
+            self._reading_paused = True
+            self._transport.pause_reading()
+
+    def _fail(self, exc):
+        self._packets.put_nowait(exc)
+        self._transport.close()
+
+    async def recv_cmd(self):
+        item = await self._packets.get()
+        if isinstance(item, BaseException):
+            raise item
+        if self._reading_paused and self._packets.qsize() <= self._queue_limit // 2:
+            self._reading_paused = False
+            self._transport.resume_reading()
+        return item
+
+class ReadIntoProtocol(BufferedStreamProtocol):
+    """Read from a stream directly into caller-provided buffers.
+
+    The transport only reads while a readinto() call is waiting, so the kernel
+    copies straight into the caller's buffer and unread data stays in the
+    socket, keeping TCP backpressure intact.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._target = None
+        self._waiter = None
+        self._eof = False
+        self._exc = None
+
+    def connection_made(self, transport):
+        super().connection_made(transport)
+        transport.pause_reading()
+
+    def connection_lost(self, exc):
+        super().connection_lost(exc)
+        self._eof = True
+        self._exc = exc
+        self._wake(0)
+
+    def eof_received(self):
+        self._eof = True
+        self._wake(0)
+        # Keep the transport open so the other direction can still be written
+        return True
+
+    def get_buffer(self, sizehint):
+        return self._target
+
+    def buffer_updated(self, nbytes):
+        self._transport.pause_reading()
+        self._wake(nbytes)
+
+    def _wake(self, nbytes):
+        waiter = self._waiter
+        if waiter is None:
+            return
+        self._waiter = None
+        self._target = None
+        if waiter.done():
+            return
+        if self._exc is not None:
+            waiter.set_exception(self._exc)
+        else:
+            waiter.set_result(nbytes)
+
+    async def readinto(self, buf):
+        """Read up to len(buf) bytes into buf and return the count, 0 on EOF"""
+        if self._exc is not None:
+            raise self._exc
+        if self._eof:
+            return 0
+        self._target = buf
+        self._waiter = self._loop.create_future()
+        self._transport.resume_reading()
+        try:
+            return await self._waiter
+        finally:
+            if self._waiter is not None:
+                # Cancelled before any data arrived
+                self._waiter = None
+                self._target = None
+                self._transport.pause_reading()
+
+    async def read(self, n):
+        buf = bytearray(n)
+        nbytes = await self.readinto(buf)
+        del buf[nbytes:]
+        return bytes(buf)
+
+    async def readexactly(self, n):
+        buf = bytearray(n)
+        view = memoryview(buf)
+        pos = 0
+        while pos < n:
+            nbytes = await self.readinto(view[pos:])
+            if not nbytes:
+                raise asyncio.IncompleteReadError(bytes(buf[:pos]), n)
+            pos += nbytes
+        return bytes(buf)
+
+async def open_readinto_connection(host, port):
+    """Like asyncio.open_connection(), but the reader is a ReadIntoProtocol"""
+    loop = asyncio.get_running_loop()
+    transport, reader = await loop.create_connection(ReadIntoProtocol, host, port)
+    writer = asyncio.StreamWriter(transport, reader, None, loop)
+    return reader, writer
 
 class ProxyChannel:
     def __init__(self, proxy, name, local_id, remote_id, reader, writer):
@@ -31,60 +302,72 @@ class ProxyChannel:
         self.reader = reader
         self.writer = writer
         self.closed = False
-        self.ready_to_send = asyncio.Semaphore(0)
+        # Set while the remote side may accept another WRTE
+        self.ready_to_send = asyncio.Event()
+        # Start ready to begin reading
+        self.ready_to_send.set()
         self.sink_task = asyncio.create_task(self.sink())
-        # Start with one ready signal to begin reading
-        self.ready()
 
     async def write(self, data):
-        logger.debug(f"Channel {self.name}: Writing {len(data)} bytes to device")
+        logger.debug("Channel %s: Writing %d bytes to device", self.name, len(data))
         try:
             self.writer.write(data)
+            # The OKAY only gets queued for the proxy's next batched flush, so
+            # queue it before draining rather than waiting on drain() first
+            logger.debug("Channel %s: Sending OKAY", self.name)
+            await self.proxy.send_cmd(CMD_OKAY, self.remote_id, self.local_id)
             await self.writer.drain()
-            logger.debug(f"Channel {self.name}: Sending OKAY")
-            await self.proxy.send_cmd(b"OKAY", self.remote_id, self.local_id)
         except Exception as e:
-            logger.error(f"Channel {self.name}: Write error: {e}")
+            logger.error("Channel %s: Write error: %s", self.name, e)
             await self.close()
 
     def ready(self):
-        self.ready_to_send.release()
+        self.ready_to_send.set()
 
     async def sink(self):
-        logger.debug(f"Channel {self.name}: Starting sink")
+        logger.debug("Channel %s: Starting sink", self.name)
+        readinto = self.reader.readinto
+        send_cmd = self.proxy.send_cmd
+        acquire_buffer = self.proxy.acquire_buffer
+        release_buffer = self.proxy.release_buffer
         try:
             while not self.closed:
-                await self.ready_to_send.acquire()
+                await self.ready_to_send.wait()
                 if self.closed:
                     break
-                logger.debug(f"Channel {self.name}: Reading from device")
+                logger.debug("Channel %s: Reading from device", self.name)
+                buf = acquire_buffer()
                 try:
-                    data = await self.reader.read(self.proxy.max_data_len)
-                    if not data:
-                        logger.debug(f"Channel {self.name}: EOF from device")
+                    n = await readinto(buf)
+                    if not n:
+                        logger.debug("Channel %s: EOF from device", self.name)
                         # For shell commands, don't immediately close on EOF
                         # The process might still be running
                         if self.name.startswith('shell:'):
-                            logger.debug(f"Channel {self.name}: Shell EOF, waiting for explicit close")
+                            logger.debug("Channel %s: Shell EOF, waiting for explicit close", self.name)
                             await asyncio.sleep(0.1)
                             continue
                         break
-                    logger.debug(f"Channel {self.name}: Sending WRTE with {len(data)} bytes")
-                    await self.proxy.send_cmd(b"WRTE", self.remote_id, self.local_id, data)
+                    logger.debug("Channel %s: Sending WRTE with %d bytes", self.name, n)
+                    self.ready_to_send.clear()
+                    await send_cmd(CMD_WRTE, self.remote_id, self.local_id, memoryview(buf)[:n])
                 except Exception as e:
-                    logger.error(f"Channel {self.name}: Read error: {e}")
+                    logger.error("Channel %s: Read error: %s", self.name, e)
                     break
+                finally:
+                    release_buffer(buf)
         except Exception as e:
-            logger.error(f"Channel {self.name}: Sink error: {e}")
+            logger.error("Channel %s: Sink error: %s", self.name, e)
         finally:
             if not self.closed:
                 await self.close()
 
     async def close(self):
         if not self.closed:
-            logger.debug(f"Channel {self.name}: Closing")
+            logger.debug("Channel %s: Closing", self.name)
             self.closed = True
-            self.ready_to_send.release()  # Release any waiting sink
+            self.proxy.streams.pop(self.remote_id, None)
+            self.ready_to_send.set()  # Release any waiting sink
             if not self.sink_task.done():
                 self.sink_task.cancel()
             try:
@@ -92,45 +375,46 @@ class ProxyChannel:
                 await self.writer.wait_closed()
             except:
                 pass
-            await self.proxy.send_cmd(b"CLSE", self.remote_id, self.local_id)
+            await self.proxy.send_cmd(CMD_CLSE, self.remote_id, self.local_id)
 
 async def open_client_stream(adb_addr, device_id, destination):
-    logger.debug(f"Opening stream to {destination} for device {device_id}")
-    reader, writer = await asyncio.open_connection(*adb_addr)
+    """Open destination (bytes, e.g. b"shell:ls") on device_id via local ADB"""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Opening stream to %s for device %s", destination.decode(), device_id)
+    reader, writer = await open_readinto_connection(*adb_addr)
+    tune_socket(writer)
     logger.debug("Connected to local ADB")
-    for cmd in [f"host:transport:{device_id}", destination]:
-        cmd_b = cmd.encode()
-        writer.write(f"{len(cmd_b):04x}".encode() + cmd_b)
-        await writer.drain()
-        logger.debug(f"Sent command: {cmd}")
+    for cmd in [b"host:transport:" + device_id.encode(), destination]:
+        await send_host_cmd(writer, cmd)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sent command: %s", cmd.decode())
         status = await reader.readexactly(4)
-        logger.debug(f"Received status: {status}")
+        logger.debug("Received status: %s", status)
         if status != b"OKAY":
             try:
                 len_b = await reader.readexactly(4)
                 err = await reader.readexactly(int(len_b, 16))
-                logger.error(f"Error response: {err.decode()}")
+                logger.error("Error response: %s", err.decode())
                 writer.close()
                 raise Exception(f"Failed: {err.decode()}")
             except:
                 writer.close()
-                raise Exception(f"Failed to open {destination}")
+                raise Exception(f"Failed to open {destination.decode()}")
     logger.debug("Stream opened successfully")
     return reader, writer
 
 async def list_adb_devices(adb_addr):
     reader, writer = await asyncio.open_connection(*adb_addr)
     cmd = b"host:devices"
-    writer.write(f"{len(cmd):04x}".encode() + cmd)
-    await writer.drain()
+    await send_host_cmd(writer, cmd)
     status = await reader.readexactly(4)
     if status != b"OKAY":
         raise Exception("Failed")
     len_str = await reader.readexactly(4)
     data = await reader.readexactly(int(len_str, 16))
     writer.close()
-    lines = data.decode().splitlines()
-    return [line.split("\t")[0] for line in lines if line.endswith("\tdevice")]
+    # Parse as bytes and decode only the serials of ready devices
+    return [line[:line.index(b"\t")].decode() for line in data.splitlines() if line.endswith(b"\tdevice")]
 
 class AdbDeviceProxy:
     def __init__(self, reader, writer, device_id, adb_addr):
@@ -139,63 +423,104 @@ class AdbDeviceProxy:
         self.device_id = device_id
         self.adb_addr = adb_addr
         self.protocol_version = 0x01000000
-        self.max_data_len = 256 * 1024
+        self.max_data_len = MAX_DATA_LEN
         self.device_name = f"proxy_{device_id}"
+        self.cnxn_banner = f"device::{self.device_name}\0".encode()
         self.streams = {}
         self.next_remote_id = 1
+        self._loop = asyncio.get_running_loop()
+        # Control frames queued for the next event loop iteration
+        self._pending = []
+        self._flush_scheduled = False
+        # Reusable WRTE payload buffers for channel sinks
+        self._bufpool = []
+
+    def acquire_buffer(self):
+        if self._bufpool:
+            return self._bufpool.pop()
+        return bytearray(self.max_data_len)
+
+    def release_buffer(self, buf):
+        # The transport may still reference a buffer it hasn't fully sent
+        if self.writer.transport.get_write_buffer_size():
+            return
+        if len(self._bufpool) < 2 * len(self.streams):
+            self._bufpool.append(buf)
 
-    async def send_cmd(self, *args):
-        await send_cmd(self.writer, *args)
+    async def send_cmd(self, cmd_id, arg0, arg1, data=b""):
+        self._pending.append(pack_header(cmd_id, arg0, arg1, data))
+        if data:
+            # Payload frames go out right away, behind any queued control frames
+            self._pending.append(data)
+            await self.flush()
+        elif not self._flush_scheduled:
+            # Batch empty control frames (OKAY/CLSE) into one write per loop iteration
+            self._flush_scheduled = True
+            self._loop.call_soon(self._flush_pending)
+
+    def _flush_pending(self):
+        self._flush_scheduled = False
+        if self._pending:
+            self.writer.writelines(self._pending)
+            self._pending.clear()
+
+    async def flush(self):
+        self._flush_pending()
+        await self.writer.drain()
 
     async def recv_cmd(self):
-        return await recv_cmd(self.reader)
+        return await self.reader.recv_cmd()
 
     async def run(self):
-        logger.info(f"Proxy for {self.device_id}: Starting")
+        logger.info("Proxy for %s: Starting", self.device_id)
         cmd, arg0, arg1, data = await self.recv_cmd()
-        logger.debug(f"Proxy for {self.device_id}: Received {cmd}")
-        if cmd != b"CNXN":
-            raise Exception(f"Expected CNXN, got {cmd}")
-        await self.send_cmd(b"CNXN", self.protocol_version, self.max_data_len, f"device::{self.device_name}\0".encode())
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Proxy for %s: Received %s", self.device_id, _U32.pack(cmd))
+        if cmd != CMD_CNXN:
+            raise Exception(f"Expected CNXN, got {_U32.pack(cmd)}")
+        await self.send_cmd(CMD_CNXN, self.protocol_version, self.max_data_len, self.cnxn_banner)
         while True:
             cmd, local_id, remote_id, data = await self.recv_cmd()
-            logger.debug(f"Proxy for {self.device_id}: Received {cmd} local_id={local_id} remote_id={remote_id} data_len={len(data)}")
-            if cmd == b"OPEN":
-                destination = data.rstrip(b"\0").decode()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Proxy for %s: Received %s local_id=%d remote_id=%d data_len=%d",
+                             self.device_id, _U32.pack(cmd), local_id, remote_id, len(data))
+            if cmd == CMD_OPEN:
+                destination = data.rstrip(b"\0")
+                name = destination.decode()
                 remote_id = self.next_remote_id
                 self.next_remote_id += 1
-                logger.info(f"Proxy for {self.device_id}: Opening channel to {destination}")
+                logger.info("Proxy for %s: Opening channel to %s", self.device_id, name)
                 try:
                     s_reader, s_writer = await open_client_stream(self.adb_addr, self.device_id, destination)
-                    channel = ProxyChannel(self, destination, local_id, remote_id, s_reader, s_writer)
+                    channel = ProxyChannel(self, name, local_id, remote_id, s_reader, s_writer)
                     self.streams[remote_id] = channel
-                    await self.send_cmd(b"OKAY", remote_id, local_id)
-                    logger.debug(f"Successfully opened channel {remote_id} for {destination}")
+                    await self.send_cmd(CMD_OKAY, remote_id, local_id)
+                    logger.debug("Successfully opened channel %d for %s", remote_id, name)
                 except Exception as e:
-                    logger.warning(f"Failed to open {destination}: {e}")
-                    await self.send_cmd(b"CLSE", local_id, 0)
-            elif cmd == b"WRTE":
+                    logger.warning("Failed to open %s: %s", name, e)
+                    await self.send_cmd(CMD_CLSE, local_id, 0)
+            elif cmd == CMD_WRTE:
                 channel = self.streams.get(remote_id)
                 if channel:
                     await channel.write(data)
-            elif cmd == b"OKAY":
+            elif cmd == CMD_OKAY:
                 channel = self.streams.get(remote_id)
                 if channel:
-                    logger.debug(f"Proxy for {self.device_id}: Received OKAY for channel {remote_id}")
+                    logger.debug("Proxy for %s: Received OKAY for channel %d", self.device_id, remote_id)
                     channel.ready()
-            elif cmd == b"CLSE":
-                channel = self.streams.get(remote_id)
-                if channel:
-                    logger.debug(f"Proxy for {self.device_id}: Closing channel {remote_id} ({channel.name})")
+            elif cmd == CMD_CLSE:
+                channel = self.streams.pop(remote_id, None)
+                if channel is not None:
+                    logger.debug("Proxy for %s: Closing channel %d (%s)", self.device_id, remote_id, channel.name)
                     await channel.close()
-                    del self.streams[remote_id]
                 else:
                     # Send CLSE response for unknown channel
-                    logger.debug(f"Proxy for {self.device_id}: Received CLSE for unknown channel {remote_id}")
-                    await self.send_cmd(b"CLSE", local_id, 0)
+                    logger.debug("Proxy for %s: Received CLSE for unknown channel %d", self.device_id, remote_id)
+                    await self.send_cmd(CMD_CLSE, local_id, 0)
 
 async def handle_connection(device_id, adb_addr, reader, writer):
     try:
+        tune_socket(writer)
         proxy = AdbDeviceProxy(reader, writer, device_id, adb_addr)
         await proxy.run()
     except Exception as e:
@@ -203,6 +528,62 @@ async def handle_connection(device_id, adb_addr, reader, writer):
     finally:
         writer.close()
 
+SPLICE_CHUNK = 1 << 20
+SPLICE_FLAGS = getattr(os, "SPLICE_F_MOVE", 0) | getattr(os, "SPLICE_F_MORE", 0) | getattr(os, "SPLICE_F_NONBLOCK", 0)
+
+async def _wait_fd(add, remove, fd):
+    fut = asyncio.get_running_loop().create_future()
+
+    def on_ready():
+        remove(fd)
+        if not fut.done():
+            fut.set_result(None)
+
+    add(fd, on_ready)
+    try:
+        await fut
+    finally:
+        remove(fd)
+
+async def splice_stream(src_writer, dst_writer):
+    """Move bytes from src to dst socket in the kernel with os.splice (Linux).
+
+    The source must not be read through its transport (ReadIntoProtocol only
+    reads on demand) and nothing else may write to the destination. Both
+    sockets are driven through dup()ed descriptors so their transports keep
+    ownership of the originals. Returns the number of bytes moved.
+    """
+    loop = asyncio.get_running_loop()
+    src_fd = os.dup(src_writer.get_extra_info('socket').fileno())
+    dst_fd = os.dup(dst_writer.get_extra_info('socket').fileno())
+    pipe_r, pipe_w = os.pipe()
+    try:
+        try:
+            fcntl.fcntl(pipe_w, fcntl.F_SETPIPE_SZ, SPLICE_CHUNK)
+        except (AttributeError, OSError):
+            pass
+        transferred = 0
+        while True:
+            try:
+                n = os.splice(src_fd, pipe_w, SPLICE_CHUNK, flags=SPLICE_FLAGS)
+            except BlockingIOError:
+                await _wait_fd(loop.add_reader, loop.remove_reader, src_fd)
+                continue
+            if not n:
+                return transferred
+            transferred += n
+            while n:
+                try:
+                    n -= os.splice(pipe_r, dst_fd, n, flags=SPLICE_FLAGS)
+                except BlockingIOError:
+                    await _wait_fd(loop.add_writer, loop.remove_writer, dst_fd)
+    finally:
+        for fd in (src_fd, dst_fd, pipe_r, pipe_w):
+            os.close(fd)
+
+SCRCPY_SERVER_CMD = b"shell:CLASSPATH=/data/local/tmp/scrcpy-server.jar app_process / com.genymobile.scrcpy.Server 3.3.1 tunnel_forward=true log_level=info"
+SCRCPY_SOCKET_CMD = b"localabstract:scrcpy"
+
 class ScrcpyTcpProxy:
     def __init__(self, device_id, adb_addr, scrcpy_port):
         self.device_id = device_id
@@ -225,8 +606,7 @@ class ScrcpyTcpProxy:
             # Setup transport to device
             transport_cmd = f"host:transport:{self.device_id}"
             cmd_b = transport_cmd.encode()
-            adb_writer.write(f"{len(cmd_b):04x}".encode() + cmd_b)
-            await adb_writer.drain()
+            await send_host_cmd(adb_writer, cmd_b)
             
             status = await adb_reader.readexactly(4)
             if status != b"OKAY":
@@ -235,10 +615,7 @@ class ScrcpyTcpProxy:
                 return
             
             # Start scrcpy server with tunnel_forward=true
-            server_cmd = "shell:CLASSPATH=/data/local/tmp/scrcpy-server.jar app_process / com.genymobile.scrcpy.Server 3.3.1 tunnel_forward=true log_level=info"
-            cmd_b = server_cmd.encode()
-            adb_writer.write(f"{len(cmd_b):04x}".encode() + cmd_b)
-            await adb_writer.drain()
+            await send_host_cmd(adb_writer, SCRCPY_SERVER_CMD)
             
             status = await adb_reader.readexactly(4)
             if status != b"OKAY":
@@ -263,20 +640,17 @@ class ScrcpyTcpProxy:
     async def _keep_server_alive(self, adb_reader, adb_writer):
         """Keep the scrcpy server shell session alive"""
         try:
-            # Read any output from the server to keep connection alive
+            # Read any output from the server to keep connection alive; the
+            # read blocks until output or EOF arrives, so there is no polling
             while True:
-                try:
-                    data = await asyncio.wait_for(adb_reader.read(1024), timeout=1.0)
-                    if not data:
-                        break
-                    # Log server output for debugging
-                    if data.strip():
-                        logger.debug(f"Scrcpy server output: {data.decode('utf-8', errors='ignore').strip()}")
-                except asyncio.TimeoutError:
-                    # No data received, continue to keep connection alive
-                    continue
+                data = await adb_reader.read(1024)
+                if not data:
+                    break
+                # Log server output for debugging
+                if logger.isEnabledFor(logging.DEBUG) and data.strip():
+                    logger.debug("Scrcpy server output: %s", data.decode('utf-8', errors='ignore').strip())
         except Exception as e:
-            logger.debug(f"Scrcpy server session ended: {e}")
+            logger.debug("Scrcpy server session ended: %s", e)
         finally:
             try:
                 adb_writer.close()
@@ -287,80 +661,95 @@ class ScrcpyTcpProxy:
     async def handle_scrcpy_connection(self, reader, writer):
         """Handle scrcpy TCP connections (video/audio/control streams)"""
         client_addr = writer.get_extra_info('peername')
-        logger.info(f"Scrcpy connection from {client_addr} for device {self.device_id}")
+        logger.info("Scrcpy connection from %s for device %s", client_addr, self.device_id)
         
         adb_reader = None
         adb_writer = None
         
         try:
+            tune_socket(writer)
+
             # First, ensure scrcpy server is running on device
             await self.ensure_scrcpy_server_running()
             
             # Create reverse connection to device's localabstract:scrcpy
-            logger.debug(f"Connecting to ADB at {self.adb_addr}")
-            adb_reader, adb_writer = await asyncio.open_connection(*self.adb_addr)
+            logger.debug("Connecting to ADB at %s", self.adb_addr)
+            adb_reader, adb_writer = await open_readinto_connection(*self.adb_addr)
+            tune_socket(adb_writer)
             logger.debug("Connected to ADB successfully")
             
             # Setup transport to device
             transport_cmd = f"host:transport:{self.device_id}"
             cmd_b = transport_cmd.encode()
-            adb_writer.write(f"{len(cmd_b):04x}".encode() + cmd_b)
-            await adb_writer.drain()
-            logger.debug(f"Sent transport command: {transport_cmd}")
+            await send_host_cmd(adb_writer, cmd_b)
+            logger.debug("Sent transport command: %s", transport_cmd)
             
             status = await adb_reader.readexactly(4)
-            logger.debug(f"Transport status: {status}")
+            logger.debug("Transport status: %s", status)
             if status != b"OKAY":
-                logger.error(f"Failed to setup transport for {self.device_id}, status: {status}")
+                logger.error("Failed to setup transport for %s, status: %s", self.device_id, status)
                 return
                 
             # Connect to localabstract:scrcpy on device
-            scrcpy_cmd = "localabstract:scrcpy"
-            cmd_b = scrcpy_cmd.encode()
-            adb_writer.write(f"{len(cmd_b):04x}".encode() + cmd_b)
-            await adb_writer.drain()
-            logger.debug(f"Sent scrcpy command: {scrcpy_cmd}")
+            await send_host_cmd(adb_writer, SCRCPY_SOCKET_CMD)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Sent scrcpy command: %s", SCRCPY_SOCKET_CMD.decode())
             
             status = await adb_reader.readexactly(4)
-            logger.debug(f"Scrcpy socket status: {status}")
+            logger.debug("Scrcpy socket status: %s", status)
             if status != b"OKAY":
-                logger.error(f"Failed to connect to scrcpy socket on {self.device_id}, status: {status}")
+                logger.error("Failed to connect to scrcpy socket on %s, status: %s", self.device_id, status)
                 return
                 
-            logger.info(f"Scrcpy TCP tunnel established for {self.device_id}")
+            logger.info("Scrcpy TCP tunnel established for %s", self.device_id)
             
             # Bidirectional data forwarding
-            async def forward_data(src_reader, dst_writer, direction):
+            async def forward_data(src_reader, dst_writer, direction, splice_from=None):
                 try:
+                    if splice_from is not None:
+                        bytes_transferred = await splice_stream(splice_from, dst_writer)
+                        logger.debug("Scrcpy %s: EOF reached, %d bytes spliced", direction, bytes_transferred)
+                        return
+                    src_read = src_reader.read
+                    dst_write = dst_writer.write
+                    dst_drain = dst_writer.drain
                     bytes_transferred = 0
                     while True:
-                        data = await src_reader.read(8192)
+                        data = await src_read(8192)
                         if not data:
-                            logger.debug(f"Scrcpy {direction}: EOF reached, {bytes_transferred} bytes transferred")
+                            logger.debug("Scrcpy %s: EOF reached, %d bytes transferred", direction, bytes_transferred)
                             break
-                        dst_writer.write(data)
-                        await dst_writer.drain()
+                        dst_write(data)
+                        await dst_drain()
                         bytes_transferred += len(data)
                         if bytes_transferred % 100000 == 0:  # Log every 100KB
-                            logger.debug(f"Scrcpy {direction}: {bytes_transferred} bytes transferred")
+                            logger.debug("Scrcpy %s: %d bytes transferred", direction, bytes_transferred)
                 except Exception as e:
-                    logger.debug(f"Scrcpy {direction} forwarding ended: {e}")
+                    logger.debug("Scrcpy %s forwarding ended: %s", direction, e)
                 finally:
                     try:
                         dst_writer.close()
                     except:
                         pass
             
-            # Start bidirectional forwarding
+            # Start bidirectional forwarding. The device side is read on demand
+            # only, so the heavy device->client stream can be spliced in the
+            # kernel where os.splice is available.
             logger.debug("Starting bidirectional data forwarding")
-            await asyncio.gather(
-                forward_data(reader, adb_writer, "client->device"),
-                forward_data(adb_reader, writer, "device->client"),
-                return_exceptions=True
-            )
+            splice_from = adb_writer if hasattr(os, "splice") else None
+            tasks = [
+                asyncio.create_task(forward_data(reader, adb_writer, "client->device")),
+                asyncio.create_task(forward_data(adb_reader, writer, "device->client", splice_from)),
+            ]
+            # Spliced sockets are held open by their dup()ed descriptors, so
+            # closing one side no longer ends the other; stop it explicitly
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
             
         except Exception as e:
-            logger.error(f"Scrcpy connection error for {self.device_id}: {e}")
+            logger.error("Scrcpy connection error for %s: %s", self.device_id, e)
         finally:
             try:
                 writer.close()
@@ -371,11 +760,12 @@ class ScrcpyTcpProxy:
                     adb_writer.close()
             except:
                 pass
-            logger.info(f"Scrcpy connection closed for {self.device_id}")
+            logger.info("Scrcpy connection closed for %s", self.device_id)
 
 async def main():
+    # Per-packet debug logging is expensive; opt in with ADB_PROXY_LOG_LEVEL=DEBUG
     logging.basicConfig(
-        level=logging.DEBUG,
+        level=os.environ.get("ADB_PROXY_LOG_LEVEL", "INFO").upper(),
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     adb_addr = ("localhost", 5037)
@@ -392,15 +782,19 @@ async def main():
         print(f"Found {len(devices)} device(s)")
         print("\n=== ADB Proxy Ports ===")
         
+        loop = asyncio.get_running_loop()
         for idx, device_id in enumerate(devices):
             adb_port = adb_base_port + idx
             scrcpy_port = scrcpy_base_port + idx
             
             # Start ADB proxy server
-            adb_server = await asyncio.start_server(
-                lambda r, w, dev=device_id: handle_connection(dev, adb_addr, r, w), 
+            adb_server = await loop.create_server(
+                lambda dev=device_id: AdbPacketProtocol(
+                    lambda r, w: handle_connection(dev, adb_addr, r, w)
+                ),
                 "0.0.0.0", 
-                adb_port
+                adb_port,
+                backlog=4096
             )
             servers.append(adb_server)
             
@@ -409,7 +803,8 @@ async def main():
             scrcpy_server = await asyncio.start_server(
                 scrcpy_proxy.handle_scrcpy_connection,
                 "0.0.0.0",
-                scrcpy_port
+                scrcpy_port,
+                backlog=4096
             )
             servers.append(scrcpy_server)
             logger.info(f"Scrcpy TCP proxy started on port {scrcpy_port} for device {device_id}")
@@ -433,4 +828,10 @@ async def main():
         raise
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if uvloop is not None and hasattr(uvloop, "run"):
+        uvloop.run(main())
+    else:
+        if uvloop is not None:
+            # uvloop < 0.18 has no run(); install its event loop policy instead
+            uvloop.install()
+        asyncio.run(main())